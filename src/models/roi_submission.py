@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Numeric
+from sqlalchemy.orm import deferred
 from datetime import datetime
 import uuid
 import json
@@ -26,13 +27,14 @@ class ROISubmission(db.Model):
     business_stage = db.Column(db.String(50), nullable=False)
     biggest_challenges = db.Column(db.Text)  # JSON string
     
-    # Contact information (encrypted fields)
+    # Contact information (encrypted fields are deferred: only loaded on access
+    # or when a query asks for the 'encrypted' group)
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(255), nullable=False)  # Will be encrypted
+    email = deferred(db.Column(db.String(255), nullable=False), group='encrypted')  # Will be encrypted
     business_name = db.Column(db.String(200), nullable=False)
     website = db.Column(db.String(255))  # Optional
-    phone = db.Column(db.String(50))  # Optional, will be encrypted
+    phone = deferred(db.Column(db.String(50)), group='encrypted')  # Optional, will be encrypted
     
     # Lead scoring and tier
     lead_score = db.Column(db.Integer, nullable=False, default=0)
@@ -44,6 +46,12 @@ class ROISubmission(db.Model):
     email_sent = db.Column(db.Boolean, default=False)
     hubspot_synced = db.Column(db.Boolean, default=False)
     
+    # GDPR consent tracking
+    consent_marketing = db.Column(db.Boolean, default=False)
+    consent_analytics = db.Column(db.Boolean, default=False)
+    consent_timestamp = db.Column(db.DateTime)
+    privacy_policy_accepted = db.Column(db.Boolean, default=False)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
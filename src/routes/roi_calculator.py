@@ -7,7 +7,8 @@ from flask import Blueprint, request, jsonify
 import json
 from uuid import uuid4
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import undefer_group
 
 from src.models.roi_submission import ROISubmission
 from src.models.user import db
@@ -135,6 +136,13 @@ def submit_roi_calculation():
         db.session.add(submission)
         db.session.commit()
         
+        # The commit expired the row; reload it once including the deferred
+        # contact columns the emails read, rather than in two SELECTs
+        db.session.get(
+            ROISubmission, inspect(submission).identity,
+            options=[undefer_group('encrypted')], populate_existing=True
+        )
+        
         # Calculate projections for response
         projections = submission.calculate_projections()
         
@@ -24,6 +24,9 @@ class HubSpotServiceEnhanced:
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        # One pooled session keeps the HubSpot connection alive across calls
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
         self.max_retries = 3
         self.retry_delay = 2
     
@@ -355,17 +358,11 @@ class HubSpotServiceEnhanced:
         """Make HTTP request with retry logic"""
         for attempt in range(self.max_retries):
             try:
-                if method == 'GET':
-                    response = requests.get(url, headers=self.headers)
-                elif method == 'POST':
-                    response = requests.post(url, headers=self.headers, json=payload)
-                elif method == 'PATCH':
-                    response = requests.patch(url, headers=self.headers, json=payload)
-                elif method == 'PUT':
-                    response = requests.put(url, headers=self.headers, json=payload)
-                else:
+                if method not in ('GET', 'POST', 'PATCH', 'PUT'):
                     return None
                 
+                response = self.session.request(method, url, json=payload)
+                
                 if response.status_code in [200, 201, 204]:
                     return response.json() if response.content else {}
                 elif response.status_code == 429:  # Rate limited
@@ -3,7 +3,7 @@ Production database configuration and utilities
 """
 import os
 import logging
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.pool import QueuePool
 from flask_sqlalchemy import SQLAlchemy
 
@@ -100,6 +100,45 @@ def create_database_indexes(db):
     except Exception as e:
         logger.error(f"Error creating database indexes: {e}")
 
+# Columns added to roi_submissions after it first shipped; create_all never
+# alters an existing table, so add_missing_columns adds them in place
+CONSENT_COLUMNS = ('consent_marketing', 'consent_analytics', 'consent_timestamp', 'privacy_policy_accepted')
+
+def add_missing_columns(db):
+    """Add the consent columns to a roi_submissions table created before them"""
+    try:
+        inspector = inspect(db.engine)
+        table = db.metadata.tables['roi_submissions']
+        if not inspector.has_table(table.name):
+            return
+        
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        preparer = db.engine.dialect.identifier_preparer
+        
+        with db.engine.connect() as connection:
+            for name in CONSENT_COLUMNS:
+                if name in existing_columns:
+                    continue
+                
+                column = table.columns[name]
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                statement = (
+                    f'ALTER TABLE {preparer.format_table(table)} '
+                    f'ADD COLUMN {preparer.format_column(column)} {column_type}'
+                )
+                # Existing rows take the model's boolean default rather than NULL
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if isinstance(default, bool):
+                    statement += f' DEFAULT {str(default).upper()}'
+                
+                connection.execute(text(statement))
+                logger.info("Added missing column %s.%s", table.name, name)
+            
+            connection.commit()
+            
+    except Exception as e:
+        logger.error(f"Error adding missing columns: {e}")
+
 def test_database_connection(app, db_instance):
     """Test database connection using existing db instance within app context"""
     try:
@@ -207,7 +246,10 @@ def ensure_database_stability(app, db):
                 logger.error(f"❌ Database table creation failed: {e}")
                 return False
             
-            # 3. Create indexes safely
+            # 3. Add columns introduced since the tables were created
+            add_missing_columns(db)
+            
+            # 4. Create indexes safely
             try:
                 create_database_indexes(db)
                 logger.info("✅ Database indexes verified/created")
@@ -215,7 +257,7 @@ def ensure_database_stability(app, db):
                 logger.error(f"❌ Database index creation failed: {e}")
                 # Non-critical, continue
             
-            # 4. Test write capability
+            # 5. Test write capability
             try:
                 with db.engine.connect() as connection:
                     # Test if we can write to database
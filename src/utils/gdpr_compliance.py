@@ -4,8 +4,11 @@ GDPR Compliance Utilities for ROI Calculator
 import os
 import logging
 import json
+import gzip
+import hashlib
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+from sqlalchemy.orm import undefer_group
 from src.models.roi_submission import ROISubmission
 from src.models.user import db
 from src.utils.security import decrypt_sensitive_data, validate_email
@@ -50,19 +53,24 @@ class GDPRCompliance:
             if not validate_email(email):
                 return {'success': False, 'error': 'Invalid email format'}
             
-            # Find all submissions for this email
-            submissions = ROISubmission.query.filter_by(email=email).all()
+            # Find all submissions for this email, loading the deferred
+            # encrypted columns in the same query since every row decrypts them
+            submissions = ROISubmission.query.options(
+                undefer_group('encrypted')
+            ).filter_by(email=email).all()
             
             if not submissions:
                 return {'success': False, 'error': 'No data found for this email'}
             
             exported_data = {
+                # Naive UTC, the same form as the stored timestamps below
                 'export_date': datetime.utcnow().isoformat(),
                 'email': email,
                 'submissions': []
             }
             
             for submission in submissions:
+                consent_timestamp = submission.consent_timestamp
                 submission_data = {
                     'submission_id': submission.submission_id,
                     'timestamp': submission.timestamp.isoformat(),
@@ -97,7 +105,7 @@ class GDPRCompliance:
                     'consent_data': {
                         'consent_marketing': submission.consent_marketing,
                         'consent_analytics': submission.consent_analytics,
-                        'consent_timestamp': submission.consent_timestamp.isoformat() if submission.consent_timestamp else None,
+                        'consent_timestamp': consent_timestamp.isoformat() if consent_timestamp else None,
                         'privacy_policy_accepted': submission.privacy_policy_accepted
                     }
                 }
@@ -181,20 +189,20 @@ class GDPRCompliance:
             if not validate_email(email):
                 return {'success': False, 'error': 'Invalid email format'}
             
-            submissions = ROISubmission.query.filter_by(email=email).all()
+            # Apply the consent change to every submission in one UPDATE
+            # statement instead of loading and flushing each row
+            values = {'consent_timestamp': datetime.utcnow()}
+            if 'marketing' in consent_updates:
+                values['consent_marketing'] = consent_updates['marketing']
+            if 'analytics' in consent_updates:
+                values['consent_analytics'] = consent_updates['analytics']
             
-            if not submissions:
-                return {'success': False, 'error': 'No data found for this email'}
+            updated_count = ROISubmission.query.filter_by(email=email).update(
+                values, synchronize_session=False
+            )
             
-            updated_count = 0
-            for submission in submissions:
-                if 'marketing' in consent_updates:
-                    submission.consent_marketing = consent_updates['marketing']
-                if 'analytics' in consent_updates:
-                    submission.consent_analytics = consent_updates['analytics']
-                
-                submission.consent_timestamp = datetime.utcnow()
-                updated_count += 1
+            if not updated_count:
+                return {'success': False, 'error': 'No data found for this email'}
             
             db.session.commit()
             
@@ -279,40 +287,62 @@ def update_consent():
         logger.error(f"Update consent endpoint error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+# The privacy policy only depends on process-wide settings, so serialize it
+# once at import and serve the same bytes (with an ETag) on every request
+_PRIVACY_POLICY = {
+    'last_updated': '2024-07-16',
+    'data_controller': 'Chime HQ',
+    'contact_email': 'hello@chimehq.co',
+    'data_retention_period': f'{gdpr_compliance.data_retention_days} days',
+    'data_processing_purposes': [
+        'ROI calculation and analysis',
+        'Lead scoring and qualification',
+        'Email communication and follow-up',
+        'CRM integration and sales process',
+        'Service improvement and analytics'
+    ],
+    'user_rights': [
+        'Right to access your data',
+        'Right to rectify incorrect data',
+        'Right to erase your data',
+        'Right to restrict processing',
+        'Right to data portability',
+        'Right to object to processing',
+        'Right to withdraw consent'
+    ],
+    'data_categories': [
+        'Contact information (name, email, phone)',
+        'Business information (company, website, industry)',
+        'Financial data (revenue, orders, ad spend)',
+        'Behavioral data (conversion rates, challenges)',
+        'Technical data (IP address, browser info)'
+    ]
+}
+_PRIVACY_POLICY_BYTES = json.dumps(_PRIVACY_POLICY, separators=(',', ':'), sort_keys=True).encode('utf-8')
+_PRIVACY_POLICY_ETAG = hashlib.md5(_PRIVACY_POLICY_BYTES, usedforsecurity=False).hexdigest()
+_PRIVACY_POLICY_GZ = gzip.compress(_PRIVACY_POLICY_BYTES, compresslevel=9)
+_PRIVACY_POLICY_GZ_ETAG = f'{_PRIVACY_POLICY_ETAG}-gzip'
+
 @gdpr_bp.route('/privacy-policy', methods=['GET'])
 def privacy_policy():
     """Privacy policy endpoint"""
-    policy = {
-        'last_updated': '2024-07-16',
-        'data_controller': 'Chime HQ',
-        'contact_email': 'hello@chimehq.co',
-        'data_retention_period': f'{gdpr_compliance.data_retention_days} days',
-        'data_processing_purposes': [
-            'ROI calculation and analysis',
-            'Lead scoring and qualification',
-            'Email communication and follow-up',
-            'CRM integration and sales process',
-            'Service improvement and analytics'
-        ],
-        'user_rights': [
-            'Right to access your data',
-            'Right to rectify incorrect data',
-            'Right to erase your data',
-            'Right to restrict processing',
-            'Right to data portability',
-            'Right to object to processing',
-            'Right to withdraw consent'
-        ],
-        'data_categories': [
-            'Contact information (name, email, phone)',
-            'Business information (company, website, industry)',
-            'Financial data (revenue, orders, ad spend)',
-            'Behavioral data (conversion rates, challenges)',
-            'Technical data (IP address, browser info)'
-        ]
-    }
+    # Serve the pre-compressed body to clients that accept gzip
+    if request.accept_encodings['gzip']:
+        body, etag = _PRIVACY_POLICY_GZ, _PRIVACY_POLICY_GZ_ETAG
+    else:
+        body, etag = _PRIVACY_POLICY_BYTES, _PRIVACY_POLICY_ETAG
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+        if body is _PRIVACY_POLICY_GZ:
+            response.headers['Content-Encoding'] = 'gzip'
     
-    return jsonify(policy), 200
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 def get_gdpr_compliance():
     """Get the global GDPR compliance instance"""
@@ -7,137 +7,205 @@ Scoring system: 0-150 points total
 
 Tiers: ≥90 Hot; 60-89 Warm; <60 Cold
 """
+import json
+
+# Scoring tables and weights, defined once for every scorer below
+REVENUE_TIER_POINTS = ((500000, 70), (100000, 55), (50000, 40), (10000, 25))
+BASE_REVENUE_POINTS = 10
+BUSINESS_STAGES = ('startup', 'growth', 'established', 'mature')
+BUSINESS_STAGE_POINTS = (10, 20, 30, 40)
+HIGH_FIT_INDUSTRIES = ('fashion', 'beauty', 'sports', 'food-beverage', 'food & beverage')
+CORE_CHALLENGES = ('manual processes', 'low conversion', 'high cart abandonment')
+TIERS = ('Hot', 'Warm', 'Cold')
+
+DEMOGRAPHIC_CAP = 60
+BEHAVIORAL_CAP = 52
+FIT_CAP = 38
+OPTIONAL_FIELD_POINTS = 10
+DETAILED_CHALLENGE_POINTS = 12
+HIGH_MANUAL_HOURS = 20
+HIGH_MANUAL_HOURS_POINTS = 10
+HIGH_FIT_INDUSTRY_POINTS = 15
+OTHER_INDUSTRY_POINTS = 10
+CORE_CHALLENGE_POINTS = 13
+LONG_OTHER_CHALLENGE_LENGTH = 50
+
+
+def _revenue_points(monthly_revenue):
+    """Points for a monthly revenue figure (before the demographic cap)"""
+    for threshold, points in REVENUE_TIER_POINTS:
+        if monthly_revenue >= threshold:
+            return points
+    return BASE_REVENUE_POINTS
+
+
+def _stage_points(stage_idx):
+    """Points for a BUSINESS_STAGES index (-1 for an unknown stage)"""
+    return BUSINESS_STAGE_POINTS[stage_idx] if 0 <= stage_idx < len(BUSINESS_STAGE_POINTS) else 0
+
+
+def _tier_index(total_score):
+    """Index into TIERS for a total score"""
+    if total_score >= 90:
+        return 0
+    if total_score >= 60:
+        return 1
+    return 2
+
+
+def assign_tier(total_score):
+    """Map a total lead score to its tier"""
+    return TIERS[_tier_index(total_score)]
+
 
 def calculate_lead_score(submission_data):
     """
     Calculate lead score based on submission data
     Returns: (score, tier, breakdown)
     """
+    inputs = lead_score_inputs(submission_data)
+    total_score, tier_idx, demographic, behavioral, fit = calculate_lead_score_numeric(*inputs)
+    
     score_breakdown = {
-        'demographic': 0,
-        'behavioral': 0,
-        'fit': 0,
-        'details': {}
+        'demographic': demographic,
+        'behavioral': behavioral,
+        'fit': fit,
+        'details': _score_details(*inputs)
     }
     
+    return total_score, TIERS[tier_idx], score_breakdown
+
+
+def calculate_lead_score_numeric(monthly_revenue, stage_idx, website_flag, phone_flag,
+                                 ad_spend_flag, n_challenges, other_long_flag,
+                                 manual_hours, high_fit_industry_flag, core_challenge_flag):
+    """
+    Numeric core of calculate_lead_score, also used for bulk re-scoring
+    Takes plain numbers/flags only (stage_idx indexes BUSINESS_STAGES, -1 if
+    unknown) so it can run in a tight loop without dict lookups
+    Returns: (score, tier_idx, demographic, behavioral, fit)
+    """
     # DEMOGRAPHIC SCORING (40% weight, max 60 points)
-    demographic_score = 0
+    demographic = min(
+        min(_revenue_points(monthly_revenue), DEMOGRAPHIC_CAP) + _stage_points(stage_idx),
+        DEMOGRAPHIC_CAP
+    )
     
-    # Monthly revenue tiers
-    monthly_revenue = float(submission_data.get('monthly_revenue', 0))
-    if monthly_revenue >= 500000:
-        revenue_points = 70
-    elif monthly_revenue >= 100000:
-        revenue_points = 55
-    elif monthly_revenue >= 50000:
-        revenue_points = 40
-    elif monthly_revenue >= 10000:
-        revenue_points = 25
-    else:
-        revenue_points = 10
+    # BEHAVIORAL SCORING (35% weight, max 52 points)
+    behavioral = OPTIONAL_FIELD_POINTS * (bool(website_flag) + bool(phone_flag) + bool(ad_spend_flag))
+    if n_challenges >= 2 or other_long_flag:
+        behavioral += DETAILED_CHALLENGE_POINTS
+    if manual_hours >= HIGH_MANUAL_HOURS:
+        behavioral += HIGH_MANUAL_HOURS_POINTS
+    behavioral = min(behavioral, BEHAVIORAL_CAP)
     
-    # Cap at 60 points for demographic
-    revenue_points = min(revenue_points, 60)
-    demographic_score += revenue_points
-    score_breakdown['details']['revenue_tier'] = revenue_points
+    # FIT SCORING (25% weight, max 38 points)
+    fit = HIGH_FIT_INDUSTRY_POINTS if high_fit_industry_flag else OTHER_INDUSTRY_POINTS
+    if core_challenge_flag:
+        fit += CORE_CHALLENGE_POINTS
+    fit = min(fit, FIT_CAP)
     
-    # Business stage
-    business_stage = submission_data.get('business_stage', '').lower()
-    stage_points = {
-        'startup': 10,
-        'growth': 20,
-        'established': 30,
-        'mature': 40
-    }.get(business_stage, 0)
+    total_score = demographic + behavioral + fit
+    return total_score, _tier_index(total_score), demographic, behavioral, fit
+
+
+def _score_details(monthly_revenue, stage_idx, website_flag, phone_flag,
+                   ad_spend_flag, n_challenges, other_long_flag,
+                   manual_hours, high_fit_industry_flag, core_challenge_flag):
+    """Per-item points behind a score, for the breakdown's 'details'"""
+    details = {
+        'revenue_tier': min(_revenue_points(monthly_revenue), DEMOGRAPHIC_CAP),
+        'business_stage': _stage_points(stage_idx)
+    }
     
-    # Total demographic (but cap at 60)
-    demographic_score = min(demographic_score + stage_points, 60)
-    score_breakdown['details']['business_stage'] = stage_points
-    score_breakdown['demographic'] = demographic_score
+    for field, filled in (('website', website_flag), ('phone', phone_flag), ('monthly_ad_spend', ad_spend_flag)):
+        if filled:
+            details[f'{field}_filled'] = OPTIONAL_FIELD_POINTS
     
-    # BEHAVIORAL SCORING (35% weight, max 52 points)
-    behavioral_score = 0
+    details['detailed_challenges'] = (
+        DETAILED_CHALLENGE_POINTS if n_challenges >= 2 or other_long_flag else 0
+    )
+    if manual_hours >= HIGH_MANUAL_HOURS:
+        details['high_manual_hours'] = HIGH_MANUAL_HOURS_POINTS
     
-    # Optional fields filled (10 points each)
-    optional_fields = ['website', 'phone', 'monthly_ad_spend']
-    for field in optional_fields:
-        if submission_data.get(field):
-            behavioral_score += 10
-            score_breakdown['details'][f'{field}_filled'] = 10
+    details['industry_fit'] = HIGH_FIT_INDUSTRY_POINTS if high_fit_industry_flag else OTHER_INDUSTRY_POINTS
+    details['challenge_alignment'] = CORE_CHALLENGE_POINTS if core_challenge_flag else 0
+    return details
+
+
+def lead_score_inputs(submission_data):
+    """
+    Reduce a submission (dict or row mapping) to the positional arguments
+    of calculate_lead_score_numeric
+    """
+    business_stage = (submission_data.get('business_stage') or '').lower()
+    industry = (submission_data.get('industry') or '').lower()
     
-    # Detailed challenges (≥2 selections or "Other" text ≥50 chars)
-    challenges = submission_data.get('biggest_challenges', [])
+    challenges = submission_data.get('biggest_challenges') or []
     if isinstance(challenges, str):
         try:
-            import json
             challenges = json.loads(challenges)
-        except:
+        except ValueError:
             challenges = []
-    
-    detailed_challenge_points = 0
-    if len(challenges) >= 2:
-        detailed_challenge_points = 12
-    elif any('other' in str(challenge).lower() and len(str(challenge)) >= 50 for challenge in challenges):
-        detailed_challenge_points = 12
-    
-    behavioral_score += detailed_challenge_points
-    score_breakdown['details']['detailed_challenges'] = detailed_challenge_points
-    
-    # Manual hours ≥20
-    manual_hours = int(submission_data.get('manual_hours_per_week', 0))
-    if manual_hours >= 20:
-        behavioral_score += 10
-        score_breakdown['details']['high_manual_hours'] = 10
-    
-    # Cap behavioral at 52 points
-    behavioral_score = min(behavioral_score, 52)
-    score_breakdown['behavioral'] = behavioral_score
-    
-    # FIT SCORING (25% weight, max 38 points)
-    fit_score = 0
-    
-    # Industry fit
-    industry = submission_data.get('industry', '').lower()
-    high_fit_industries = ['fashion', 'beauty', 'sports', 'food-beverage', 'food & beverage']
-    
-    if any(ind in industry for ind in high_fit_industries):
-        industry_points = 15
-    else:
-        industry_points = 10
-    
-    fit_score += industry_points
-    score_breakdown['details']['industry_fit'] = industry_points
-    
-    # Core challenge alignment
-    core_challenges = ['manual processes', 'low conversion', 'high cart abandonment']
-    challenge_alignment = 0
-    
-    if isinstance(challenges, list):
-        for challenge in challenges:
-            challenge_str = str(challenge).lower()
-            if any(core in challenge_str for core in core_challenges):
-                challenge_alignment = 13
-                break
-    
-    fit_score += challenge_alignment
-    score_breakdown['details']['challenge_alignment'] = challenge_alignment
-    
-    # Cap fit at 38 points
-    fit_score = min(fit_score, 38)
-    score_breakdown['fit'] = fit_score
-    
-    # TOTAL SCORE AND TIER
-    total_score = demographic_score + behavioral_score + fit_score
-    
-    # Determine tier
-    if total_score >= 90:
-        tier = 'Hot'
-    elif total_score >= 60:
-        tier = 'Warm'
-    else:
-        tier = 'Cold'
-    
-    return total_score, tier, score_breakdown
+    challenge_strs = [str(challenge).lower() for challenge in challenges]
+    
+    other_long = any(
+        'other' in challenge and len(challenge) >= LONG_OTHER_CHALLENGE_LENGTH
+        for challenge in challenge_strs
+    )
+    core_challenge = isinstance(challenges, list) and any(
+        core in challenge for challenge in challenge_strs for core in CORE_CHALLENGES
+    )
+    
+    return (
+        float(submission_data.get('monthly_revenue') or 0),
+        BUSINESS_STAGES.index(business_stage) if business_stage in BUSINESS_STAGES else -1,
+        bool(submission_data.get('website')),
+        bool(submission_data.get('phone')),
+        bool(submission_data.get('monthly_ad_spend')),
+        len(challenges),
+        other_long,
+        int(submission_data.get('manual_hours_per_week') or 0),
+        any(ind in industry for ind in HIGH_FIT_INDUSTRIES),
+        core_challenge,
+    )
+
+
+def rescore_all(batch_size=500):
+    """
+    Re-score every stored submission with the current weights
+    (backfills, trying out new weights). Must run inside an app context.
+    Returns: number of submissions updated
+    """
+    from sqlalchemy import select
+    from src.models.roi_submission import ROISubmission
+    from src.models.user import db
+    
+    # Stream only the scoring columns, batch_size rows at a time, without
+    # building ORM objects
+    result = db.session.execute(select(
+        ROISubmission.id,
+        ROISubmission.monthly_revenue,
+        ROISubmission.business_stage,
+        ROISubmission.website,
+        ROISubmission.phone,
+        ROISubmission.monthly_ad_spend,
+        ROISubmission.biggest_challenges,
+        ROISubmission.manual_hours_per_week,
+        ROISubmission.industry,
+    ).execution_options(yield_per=batch_size))
+    
+    updated = 0
+    for rows in result.partitions():
+        updates = []
+        for row in rows:
+            score, tier_idx, _, _, _ = calculate_lead_score_numeric(*lead_score_inputs(row._mapping))
+            updates.append({'id': row.id, 'lead_score': score, 'tier': TIERS[tier_idx]})
+        db.session.bulk_update_mappings(ROISubmission, updates)
+        updated += len(updates)
+    db.session.commit()
+    
+    return updated
 
 
 def get_hubspot_lifecycle_stage(tier):
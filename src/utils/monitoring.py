@@ -2,9 +2,13 @@
 Monitoring and alerting utilities for ROI Calculator backend
 """
 import logging
+import os
+import queue
 import time
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 from collections import defaultdict, deque
 import threading
@@ -18,6 +22,22 @@ metrics_storage = {
 }
 metrics_lock = threading.Lock()
 
+# Alert delivery queue, drained in batches by a background thread so a slow
+# webhook never adds latency to the request that raised the alert
+alert_queue = queue.Queue(maxsize=1000)
+ALERT_BATCH_INTERVAL_SECONDS = 1
+_alert_worker = None
+_alert_worker_lock = threading.Lock()
+
+# Shared HTTP session for alert webhooks, so repeated alerts reuse a pooled
+# keep-alive connection instead of doing a TCP+TLS handshake per post
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -49,7 +69,7 @@ class SubmissionTracker:
                 'processing_time': processing_time
             })
         
-        logger.info(f"Submission success: {submission_id}")
+        logger.info("Submission success: %s", submission_id)
     
     def record_error(self, submission_id, error_type, error_message):
         """Record submission error"""
@@ -62,7 +82,7 @@ class SubmissionTracker:
                 'timestamp': time.time()
             })
         
-        logger.error(f"Submission error: {submission_id} - {error_type}: {error_message}")
+        logger.error("Submission error: %s - %s: %s", submission_id, error_type, error_message)
         
         # Send alert for critical errors
         if error_type in ['database_error', 'hubspot_error', 'email_error']:
@@ -95,34 +115,47 @@ class SubmissionTracker:
     
     def send_alert(self, title, details):
         """Send alert notification"""
-        # For now, just log the alert
-        # In production, this would send to Slack/email
-        logger.critical(f"ALERT: {title} - {json.dumps(details)}")
+        logger.critical("ALERT: %s - %s", title, json.dumps(details))
         
-        # Placeholder for Slack webhook
-        # self.send_slack_alert(title, details)
+        # Delivery happens on the alert worker; drop rather than block if
+        # the queue is backed up
+        _ensure_alert_worker()
+        try:
+            alert_queue.put_nowait((title, details))
+        except queue.Full:
+            logger.warning("Alert queue full, dropping alert: %s", title)
     
     def send_slack_alert(self, title, details):
-        """Send Slack alert (placeholder)"""
-        # This would be implemented with actual Slack webhook
-        slack_webhook_url = "https://hooks.slack.com/services/YOUR/SLACK/WEBHOOK"
+        """Send a single Slack alert"""
+        self.send_slack_alerts([(title, details)])
+    
+    def send_slack_alerts(self, alerts):
+        """Send a batch of (title, details) alerts as one Slack message"""
+        slack_webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+        if not slack_webhook_url:
+            return  # Slack alerts disabled
+        
+        if len(alerts) == 1:
+            text = f"🚨 ROI Calculator Alert: {alerts[0][0]}"
+        else:
+            text = f"🚨 ROI Calculator Alerts ({len(alerts)})"
         
         payload = {
-            "text": f"🚨 ROI Calculator Alert: {title}",
+            "text": text,
             "attachments": [{
                 "color": "danger",
+                "title": title,
                 "fields": [
                     {"title": key, "value": str(value), "short": True}
                     for key, value in details.items()
                 ]
-            }]
+            } for title, details in alerts]
         }
         
         try:
-            # requests.post(slack_webhook_url, json=payload)
-            pass  # Disabled for now
+            http_session.post(slack_webhook_url, json=payload, timeout=2)
         except Exception as e:
-            logger.error(f"Failed to send Slack alert: {e}")
+            logger.error("Failed to send Slack alert: %s", e)
 
 class EmailMonitor:
     """Monitor email delivery"""
@@ -138,7 +171,7 @@ class EmailMonitor:
                 'timestamp': time.time()
             })
         
-        logger.info(f"Email sent: {email_type} to {recipient} for {submission_id}")
+        logger.info("Email sent: %s to %s for %s", email_type, recipient, submission_id)
     
     def record_email_error(self, submission_id, email_type, error):
         """Record email error"""
@@ -151,7 +184,7 @@ class EmailMonitor:
                 'timestamp': time.time()
             })
         
-        logger.error(f"Email error: {email_type} for {submission_id} - {error}")
+        logger.error("Email error: %s for %s - %s", email_type, submission_id, error)
     
     def get_delivery_rate(self, window_minutes=60):
         """Calculate email delivery rate"""
@@ -184,7 +217,7 @@ class HubSpotMonitor:
                 'timestamp': time.time()
             })
         
-        logger.info(f"HubSpot sync success: {operation} for {submission_id} -> {hubspot_id}")
+        logger.info("HubSpot sync success: %s for %s -> %s", operation, submission_id, hubspot_id)
     
     def record_sync_error(self, submission_id, operation, error):
         """Record HubSpot sync error"""
@@ -197,7 +230,7 @@ class HubSpotMonitor:
                 'timestamp': time.time()
             })
         
-        logger.error(f"HubSpot sync error: {operation} for {submission_id} - {error}")
+        logger.error("HubSpot sync error: %s for %s - %s", operation, submission_id, error)
     
     def get_sync_rate(self, window_minutes=60):
         """Calculate HubSpot sync success rate"""
@@ -221,6 +254,37 @@ submission_tracker = SubmissionTracker()
 email_monitor = EmailMonitor()
 hubspot_monitor = HubSpotMonitor()
 
+def _alert_worker_loop():
+    """Drain the alert queue and deliver queued alerts in batches"""
+    while True:
+        batch = [alert_queue.get()]
+        while True:
+            try:
+                batch.append(alert_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        try:
+            submission_tracker.send_slack_alerts(batch)
+        except Exception as e:
+            logger.error("Failed to deliver alerts: %s", e)
+        
+        time.sleep(ALERT_BATCH_INTERVAL_SECONDS)
+
+def _ensure_alert_worker():
+    """Start the alert worker thread if it is not running in this process"""
+    global _alert_worker
+    
+    if _alert_worker is not None and _alert_worker.is_alive():
+        return
+    
+    with _alert_worker_lock:
+        if _alert_worker is None or not _alert_worker.is_alive():
+            _alert_worker = threading.Thread(
+                target=_alert_worker_loop, name='alert-worker', daemon=True
+            )
+            _alert_worker.start()
+
 def get_system_health():
     """Get overall system health metrics"""
     return {
@@ -235,6 +299,10 @@ def get_system_health():
 
 def log_submission_event(submission_id, event_type, details=None):
     """Log submission-related events"""
+    # Skip building and serializing the payload when INFO is filtered out
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
     log_data = {
         'submission_id': submission_id,
         'event_type': event_type,
@@ -244,7 +312,26 @@ def log_submission_event(submission_id, event_type, details=None):
     if details:
         log_data['details'] = details
     
-    logger.info(f"SUBMISSION_EVENT: {json.dumps(log_data)}")
+    logger.info("SUBMISSION_EVENT: %s", json.dumps(log_data))
+
+# Last time each health alert fired. A metric that stays degraded re-alerts
+# once per cooldown rather than on every health check; recovering clears it
+HEALTH_ALERT_COOLDOWN_SECONDS = 900
+_last_alert_at = {}
+
+def _should_alert(key, cooldown=HEALTH_ALERT_COOLDOWN_SECONDS):
+    """Return True (and record the time) if alert `key` is off cooldown"""
+    now = time.time()
+    with metrics_lock:
+        if now - _last_alert_at.get(key, 0) < cooldown:
+            return False
+        _last_alert_at[key] = now
+    return True
+
+def _clear_alert(key):
+    """Reset the cooldown for alert `key` once its condition has recovered"""
+    with metrics_lock:
+        _last_alert_at.pop(key, None)
 
 def check_system_health_alerts():
     """Check system health and send alerts if needed"""
@@ -252,22 +339,30 @@ def check_system_health_alerts():
     
     # Alert if success rate drops below 95%
     if health['submission_success_rate'] < 95:
-        submission_tracker.send_alert(
-            "Low Success Rate",
-            {'success_rate': health['submission_success_rate']}
-        )
+        if _should_alert('low_success_rate'):
+            submission_tracker.send_alert(
+                "Low Success Rate",
+                {'success_rate': health['submission_success_rate']}
+            )
+    else:
+        _clear_alert('low_success_rate')
     
     # Alert if email delivery rate drops below 90%
     if health['email_delivery_rate'] < 90:
-        submission_tracker.send_alert(
-            "Low Email Delivery Rate",
-            {'delivery_rate': health['email_delivery_rate']}
-        )
+        if _should_alert('low_email_delivery_rate'):
+            submission_tracker.send_alert(
+                "Low Email Delivery Rate",
+                {'delivery_rate': health['email_delivery_rate']}
+            )
+    else:
+        _clear_alert('low_email_delivery_rate')
     
     # Alert if HubSpot sync rate drops below 95%
     if health['hubspot_sync_rate'] < 95:
-        submission_tracker.send_alert(
-            "Low HubSpot Sync Rate",
-            {'sync_rate': health['hubspot_sync_rate']}
-        )
-
+        if _should_alert('low_hubspot_sync_rate'):
+            submission_tracker.send_alert(
+                "Low HubSpot Sync Rate",
+                {'sync_rate': health['hubspot_sync_rate']}
+            )
+    else:
+        _clear_alert('low_hubspot_sync_rate')
@@ -1,148 +1,301 @@
 """
 Security utilities for ROI Calculator backend
 """
+import base64
 import hashlib
 import hmac
+import logging
+import operator
+import os
+import secrets
 import time
 import re
-from functools import wraps
+import uuid
+from functools import lru_cache, wraps
+from itertools import cycle
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from flask import request, jsonify, session
-from collections import defaultdict, deque
+import redis
 import threading
 
-# Rate limiting storage
-rate_limit_storage = defaultdict(lambda: deque())
-rate_limit_lock = threading.Lock()
+# One email check shared with the form validators
+from src.utils.validation import _is_email
 
-# CSRF token storage
-csrf_tokens = {}
+logger = logging.getLogger(__name__)
+
+# Precompiled patterns
+_URL_RE = re.compile(r'^https?://[^\s/$.?#].[^\s]*$')
+
+# Translation table deleting the characters sanitize_input strips
+_SANITIZE_TABLE = str.maketrans('', '', '<>"\'')
+
+# Optional shared Redis backend. With REDIS_URL set, rate limits are kept in
+# Redis so every worker process enforces the same quota and entries expire on
+# their own; otherwise the in-process token buckets below are used.
+REDIS_URL = os.getenv('REDIS_URL')
+# Short socket timeouts: a hung Redis must fail fast into the in-memory
+# fallback rather than stall every rate-limited request.
+REDIS_SOCKET_TIMEOUT_SECONDS = 0.2
+redis_client = redis.Redis.from_url(
+    REDIS_URL,
+    socket_connect_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS
+) if REDIS_URL else None
+# After a Redis failure, go straight to the in-memory fallback for this long
+# instead of paying the socket timeout on every request (and logging each one)
+REDIS_RETRY_INTERVAL_SECONDS = 30
+_last_redis_error = 0.0
+
+# Sliding-window log in a sorted set: drop entries older than the window,
+# refuse if the window is full, otherwise record this request. Runs atomically.
+_RATE_LIMIT_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1] - ARGV[2])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+_rate_limit_script = redis_client.register_script(_RATE_LIMIT_LUA) if redis_client else None
+
+# In-process rate limiting storage: client IP -> (tokens, last_refill) token bucket
+rate_limit_storage = {}
+# Striped locks, so a request only contends with clients hashed to its stripe
+RATE_LIMIT_LOCK_STRIPES = 64
+rate_limit_locks = [threading.Lock() for _ in range(RATE_LIMIT_LOCK_STRIPES)]
+
+# CSRF tokens are stateless: issue time + random nonce, signed with HMAC-SHA256.
+# Any worker holding the key can verify them, and nothing is stored.
+CSRF_TOKEN_TTL_SECONDS = 3600
+_CSRF_NONCE_SIZE = 16
+_CSRF_PAYLOAD_SIZE = 8 + _CSRF_NONCE_SIZE
+_CSRF_TOKEN_SIZE = _CSRF_PAYLOAD_SIZE + hashlib.sha256().digest_size
+
+def _csrf_mac(payload):
+    """HMAC of a CSRF token payload under CSRF_KEY (or SECRET_KEY)"""
+    key = os.getenv('CSRF_KEY') or os.getenv('SECRET_KEY')
+    if not key:
+        raise ValueError("CSRF_KEY or SECRET_KEY environment variable is required for CSRF tokens")
+    return hmac.new(key.encode(), payload, hashlib.sha256).digest()
 
 def generate_csrf_token():
     """Generate a CSRF token"""
-    import secrets
-    token = secrets.token_urlsafe(32)
-    csrf_tokens[token] = time.time()
-    return token
+    payload = int(time.time()).to_bytes(8, 'big') + secrets.token_bytes(_CSRF_NONCE_SIZE)
+    return base64.urlsafe_b64encode(payload + _csrf_mac(payload)).decode()
 
 def validate_csrf_token(token):
     """Validate CSRF token"""
-    if not token or token not in csrf_tokens:
+    if not token or not isinstance(token, str):
         return False
     
-    # Check if token is not expired (1 hour)
-    if time.time() - csrf_tokens[token] > 3600:
-        del csrf_tokens[token]
+    try:
+        raw = base64.urlsafe_b64decode(token.encode())
+    except ValueError:
+        return False
+    
+    if len(raw) != _CSRF_TOKEN_SIZE:
+        return False
+    
+    payload, mac = raw[:_CSRF_PAYLOAD_SIZE], raw[_CSRF_PAYLOAD_SIZE:]
+    if not hmac.compare_digest(mac, _csrf_mac(payload)):
         return False
     
-    return True
+    # Check if token is not expired (1 hour)
+    issued_at = int.from_bytes(payload[:8], 'big')
+    return time.time() - issued_at <= CSRF_TOKEN_TTL_SECONDS
+
+def _redis_allow_request(client_ip, current_time, window_seconds, max_requests):
+    """Sliding-window check in Redis; returns None if Redis is unavailable"""
+    global _last_redis_error
+    if current_time - _last_redis_error < REDIS_RETRY_INTERVAL_SECONDS:
+        return None
+    
+    try:
+        return bool(_rate_limit_script(
+            keys=[f'ratelimit:{client_ip}'],
+            args=[current_time, window_seconds, max_requests, uuid.uuid4().hex]
+        ))
+    except redis.RedisError as e:
+        _last_redis_error = current_time
+        logger.error("Redis unavailable for rate limiting, using in-memory limits for %ss: %s",
+                     REDIS_RETRY_INTERVAL_SECONDS, e)
+        return None
+
+def _memory_allow_request(client_ip, current_time, refill_rate, max_requests):
+    """Token-bucket check against this process's rate_limit_storage"""
+    with rate_limit_locks[hash(client_ip) % RATE_LIMIT_LOCK_STRIPES]:
+        # Refill at refill_rate tokens per second, capped at a full bucket
+        tokens, last_refill = rate_limit_storage.get(client_ip, (max_requests, current_time))
+        tokens = min(max_requests, tokens + (current_time - last_refill) * refill_rate)
+        
+        if tokens < 1:
+            rate_limit_storage[client_ip] = (tokens, current_time)
+            return False
+        
+        # Spend a token for the current request
+        rate_limit_storage[client_ip] = (tokens - 1, current_time)
+        return True
 
 def rate_limit(max_requests=10, window_minutes=1):
     """Rate limiting decorator"""
+    # Fixed per decorated view, so work these out once rather than per request
+    window_seconds = int(window_minutes * 60)
+    refill_rate = max_requests / window_seconds
+    
     def decorator(f):
+        # Local aliases keep global lookups off the per-request path
+        now = time.time
+        redis_allow = _redis_allow_request
+        memory_allow = _memory_allow_request
+        
         @wraps(f)
         def decorated_function(*args, **kwargs):
             client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.remote_addr)
-            current_time = time.time()
-            window_seconds = window_minutes * 60
+            current_time = now()
             
-            with rate_limit_lock:
-                # Clean old requests
-                while (rate_limit_storage[client_ip] and 
-                       current_time - rate_limit_storage[client_ip][0] > window_seconds):
-                    rate_limit_storage[client_ip].popleft()
-                
-                # Check rate limit
-                if len(rate_limit_storage[client_ip]) >= max_requests:
-                    return jsonify({
-                        'error': 'Rate limit exceeded. Please try again later.',
-                        'retry_after': window_seconds
-                    }), 429
-                
-                # Add current request
-                rate_limit_storage[client_ip].append(current_time)
+            allowed = None
+            if redis_client is not None:
+                allowed = redis_allow(client_ip, current_time, window_seconds, max_requests)
+            if allowed is None:
+                allowed = memory_allow(client_ip, current_time, refill_rate, max_requests)
+            
+            # Check rate limit
+            if not allowed:
+                return jsonify({
+                    'error': 'Rate limit exceeded. Please try again later.',
+                    'retry_after': window_seconds
+                }), 429
             
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+def _sanitize_string(value):
+    """Strip dangerous characters, cap the length and trim whitespace"""
+    return value.translate(_SANITIZE_TABLE)[:1000].strip()
+
 def sanitize_input(data):
     """Sanitize input data"""
     if isinstance(data, str):
-        # Remove potentially dangerous characters
-        data = re.sub(r'[<>"\']', '', data)
-        # Limit length
-        data = data[:1000]
-        return data.strip()
-    elif isinstance(data, dict):
-        return {k: sanitize_input(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [sanitize_input(item) for item in data]
-    return data
+        return _sanitize_string(data)
+    if not isinstance(data, (dict, list)):
+        return data
+    
+    # Walk nested containers with an explicit stack instead of recursing,
+    # building cleaned copies so the caller's data is left untouched
+    cleaned = {} if isinstance(data, dict) else []
+    stack = [(data, cleaned)]
+    while stack:
+        source, target = stack.pop()
+        is_dict = isinstance(source, dict)
+        for key, value in (source.items() if is_dict else enumerate(source)):
+            if isinstance(value, str):
+                value = _sanitize_string(value)
+            elif isinstance(value, (dict, list)):
+                child = {} if isinstance(value, dict) else []
+                stack.append((value, child))
+                value = child
+            
+            if is_dict:
+                target[key] = value
+            else:
+                target.append(value)
+    
+    return cleaned
 
 def validate_email(email):
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return _is_email(email)
 
 def validate_phone(phone):
     """Validate phone format (basic validation)"""
     if not phone:
         return True  # Optional field
-    # Remove all non-digit characters
-    digits_only = re.sub(r'\D', '', phone)
+    # Count the digits, ignoring formatting characters
+    digit_count = sum(map(str.isdecimal, phone))
     # Check if it's between 10-15 digits
-    return 10 <= len(digits_only) <= 15
+    return 10 <= digit_count <= 15
 
 def validate_url(url):
     """Validate URL format"""
     if not url:
         return True  # Optional field
-    pattern = r'^https?://[^\s/$.?#].[^\s]*$'
-    return re.match(pattern, url) is not None
+    return _URL_RE.match(url) is not None
+
+# AES-GCM nonce length in bytes (the size recommended for GCM)
+_NONCE_SIZE = 12
+# Marks the ciphertext format; unprefixed values predate it and may be
+# AES-GCM or the legacy XOR scheme (':' never appears in base64)
+_CIPHERTEXT_PREFIX = 'v1:'
+
+@lru_cache(maxsize=8)
+def _get_cipher(key):
+    """AES-256-GCM cipher for an encryption key, derived once per key"""
+    return AESGCM(hashlib.sha256(key.encode()).digest())
 
 def encrypt_sensitive_data(data, key=None):
-    """Simple encryption for sensitive data"""
+    """Encrypt sensitive data with AES-256-GCM"""
     if not data:
         return data
     
-    # Use a simple XOR encryption for demonstration
-    # In production, use proper encryption libraries
     if not key:
-        import os
         key = os.getenv('ENCRYPTION_KEY')
         if not key:
             raise ValueError("ENCRYPTION_KEY environment variable is required for data encryption")
     
-    result = ""
-    for i, char in enumerate(data):
-        result += chr(ord(char) ^ ord(key[i % len(key)]))
+    nonce = os.urandom(_NONCE_SIZE)
+    ciphertext = _get_cipher(key).encrypt(nonce, data.encode(), None)
     
-    # Base64 encode the result
-    import base64
-    return base64.b64encode(result.encode()).decode()
+    # Store nonce and ciphertext together, base64 encoded behind the version
+    return _CIPHERTEXT_PREFIX + base64.b64encode(nonce + ciphertext).decode()
 
 def decrypt_sensitive_data(encrypted_data, key=None):
-    """Simple decryption for sensitive data"""
+    """Decrypt data produced by encrypt_sensitive_data"""
     if not encrypted_data:
         return encrypted_data
     
     if not key:
-        import os
         key = os.getenv('ENCRYPTION_KEY')
         if not key:
             raise ValueError("ENCRYPTION_KEY environment variable is required for data decryption")
     
+    if encrypted_data.startswith(_CIPHERTEXT_PREFIX):
+        try:
+            raw = base64.b64decode(encrypted_data[len(_CIPHERTEXT_PREFIX):].encode(), validate=True)
+            return _get_cipher(key).decrypt(raw[:_NONCE_SIZE], raw[_NONCE_SIZE:], None).decode()
+        except (InvalidTag, ValueError) as e:
+            # Wrong key or corrupted value; never fall back to XOR "plaintext"
+            logger.error("Failed to decrypt a %s value: %s", _CIPHERTEXT_PREFIX, type(e).__name__)
+            return None
+    
+    try:
+        raw = base64.b64decode(encrypted_data.encode())
+    except Exception:
+        return encrypted_data  # Return as-is if it isn't our encoding
+    
+    try:
+        return _get_cipher(key).decrypt(raw[:_NONCE_SIZE], raw[_NONCE_SIZE:], None).decode()
+    except (InvalidTag, ValueError):
+        # Unprefixed rows written before the AES-GCM switch use the legacy XOR scheme
+        return _legacy_xor_decrypt(raw, key, encrypted_data)
+
+def _legacy_xor_decrypt(raw, key, encrypted_data):
+    """Decrypt a value stored with the old XOR+base64 scheme"""
     try:
-        # Base64 decode
-        import base64
-        data = base64.b64decode(encrypted_data.encode()).decode()
+        data = raw.decode()
         
-        result = ""
-        for i, char in enumerate(data):
-            result += chr(ord(char) ^ ord(key[i % len(key)]))
+        if data.isascii() and key.isascii():
+            # XOR the whole value against the repeated key as two big ints
+            data_bytes = data.encode()
+            key_bytes = (key.encode() * (len(data_bytes) // len(key) + 1))[:len(data_bytes)]
+            xored = int.from_bytes(data_bytes, 'big') ^ int.from_bytes(key_bytes, 'big')
+            return xored.to_bytes(len(data_bytes), 'big').decode()
         
-        return result
-    except:
+        # Non-ASCII values were XORed per code point, not per byte
+        return ''.join(map(chr, map(operator.xor, map(ord, data), cycle(map(ord, key)))))
+    except Exception:
         return encrypted_data  # Return as-is if decryption fails
 
 def enforce_https():
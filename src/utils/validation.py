@@ -4,13 +4,90 @@ Implements comprehensive validation with intelligent defaults for missing fields
 """
 
 import re
+from functools import lru_cache, wraps
 from decimal import Decimal, InvalidOperation
-from urllib.parse import urlparse
+
+# Precompiled patterns
+# Email addresses are split at '@' and the last '.' and each part is matched
+# on its own, so no pattern has overlapping classes to backtrack across.
+_EMAIL_LOCAL_RE = re.compile(r'[a-zA-Z0-9._%+-]+')
+_EMAIL_HOST_RE = re.compile(r'[a-zA-Z0-9.-]+')
+_EMAIL_TLD_RE = re.compile(r'[a-zA-Z]{2,}')
+_ALPHA_RE = re.compile(r"^[a-zA-Z\s\-']+$")
+_LABEL_RE = re.compile(r'[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?')
+
+# Translation table deleting phone formatting characters: any whitespace (the
+# highest whitespace code point is U+3000) plus - ( ) + .
+_PHONE_STRIP_TABLE = str.maketrans('', '', ''.join(
+    c for c in map(chr, range(0x3001)) if c.isspace()
+) + '-()+.')
+
+# Allowed dropdown values
+VALID_INDUSTRIES = frozenset({
+    'Fashion & Apparel', 'Electronics', 'Health & Wellness', 'Home & Garden',
+    'Beauty & Cosmetics', 'Food & Beverage', 'Pet Products', 'Sports & Fitness',
+    'Automotive', 'Books & Media', 'Toys & Games', 'Other'
+})
+
+VALID_BUSINESS_STAGES = frozenset({'Startup', 'Growth', 'Established', 'Mature'})
+
+VALID_CHALLENGES = frozenset({
+    'Manual processes', 'Low conversion rates', 'High cart abandonment',
+    'Poor customer retention', 'Inventory management', 'Marketing inefficiency',
+    'Customer service issues', 'Data analysis challenges', 'Other'
+})
+
+# Defaults for fields the visitor left blank
+_DEFAULT_CONV_RATE = {'Electronics': 2.5, 'Fashion & Apparel': 2.8}
+_FALLBACK_CONV_RATE = 2.0
+
+# industry -> (minimum, share of monthly revenue) for average order value
+_DEFAULT_AOV = {
+    'Electronics': (100, 0.002),
+    'Fashion & Apparel': (50, 0.001),
+    'Beauty & Cosmetics': (50, 0.001),
+}
+_FALLBACK_AOV = (75, 0.0015)
+
+# business stage -> (minimum, revenue per hour) for manual hours per week
+_HOURS_PER_STAGE = {
+    'Startup': (10, 5000),
+    'Growth': (15, 4000),
+    'Established': (20, 3000),
+    'Mature': (25, 2500),
+}
 
 class ValidationError(Exception):
     """Custom exception for validation errors"""
     pass
 
+# Only for fields that are not personal data: a cache of emails or phone
+# numbers would keep them in process memory after an erasure request
+def _memoize_validator(func):
+    """Cache a string validator's cleaned value or error message per input"""
+    @lru_cache(maxsize=4096)
+    def cached(value, *args):
+        try:
+            return True, func(value, *args)
+        except ValidationError as e:
+            return False, str(e)
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # Only positional plain strings are cached; anything else takes the
+        # normal path
+        if kwargs or type(args[0]) is not str:
+            return func(*args, **kwargs)
+        
+        ok, result = cached(*args)
+        if not ok:
+            raise ValidationError(result)
+        return result
+    
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
 def validate_positive_number(value, field_name, allow_zero=False):
     """Validate positive numeric values"""
     try:
@@ -33,20 +110,36 @@ def validate_positive_integer(value, field_name):
     except (ValueError, TypeError):
         raise ValidationError(f"{field_name} must be a valid integer")
 
+def _is_email(email):
+    """Check email against local@host.tld without a single backtracking regex"""
+    local, at, domain = email.partition('@')
+    host, dot, tld = domain.rpartition('.')
+    return bool(
+        at and dot
+        and _EMAIL_LOCAL_RE.fullmatch(local)
+        and _EMAIL_HOST_RE.fullmatch(host)
+        and _EMAIL_TLD_RE.fullmatch(tld)
+    )
+
+def _is_domain(domain):
+    """Check a dotted domain name one label at a time"""
+    return all(_LABEL_RE.fullmatch(label) for label in domain.split('.'))
+
 def validate_email(email):
     """Validate email address"""
     if not email:
         raise ValidationError("Email is required")
     
     email = email.strip().lower()
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    
-    if not re.match(email_pattern, email):
-        raise ValidationError("Invalid email format")
     
+    # Check the length bound before matching the address parts
     if len(email) > 254:
         raise ValidationError("Email address too long")
     
+    # Shortest address _is_email accepts is a@b.co
+    if len(email) < 6 or not _is_email(email):
+        raise ValidationError("Invalid email format")
+    
     return email
 
 def validate_alphabetic(value, field_name):
@@ -62,11 +155,12 @@ def validate_alphabetic(value, field_name):
     if len(value) > 50:
         raise ValidationError(f"{field_name} must be less than 50 characters")
     
-    if not re.match(r"^[a-zA-Z\s\-']+$", value):
+    if not _ALPHA_RE.match(value):
         raise ValidationError(f"{field_name} can only contain letters, spaces, hyphens, and apostrophes")
     
     return value
 
+@_memoize_validator
 def validate_website(website):
     """Validate website URL (optional field)"""
     if not website:
@@ -76,27 +170,28 @@ def validate_website(website):
     if not website:
         return None
     
+    # Reject control and whitespace characters outright; a CR/LF stored here
+    # would reach HubSpot and the email templates verbatim
+    if not website.isprintable() or ' ' in website:
+        raise ValidationError("Invalid website URL format")
+    
     if not website.startswith(('http://', 'https://')):
         website = 'https://' + website
     
-    try:
-        parsed = urlparse(website)
-        if not parsed.netloc:
-            raise ValidationError("Invalid website URL")
-        
-        domain_pattern = r'^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*$'
-        if not re.match(domain_pattern, parsed.netloc):
-            raise ValidationError("Invalid domain name")
-        
-        url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        if parsed.query:
-            url += f"?{parsed.query}"
-        if parsed.fragment:
-            url += f"#{parsed.fragment}"
-        
-        return url
-    except Exception:
+    # Accepted grammar is scheme://host[/path][?query][#fragment]; the host
+    # runs up to the first '/', '?' or '#'
+    scheme, _, rest = website.partition('://')
+    host_end = len(rest)
+    for separator in '/?#':
+        index = rest.find(separator, 0, host_end)
+        if index != -1:
+            host_end = index
+    
+    host = rest[:host_end]
+    if not host or not _is_domain(host):
         raise ValidationError("Invalid website URL format")
+    
+    return f"{scheme}://{host}{rest[host_end:]}"
 
 def validate_phone(phone):
     """Validate phone number (optional field)"""
@@ -107,14 +202,15 @@ def validate_phone(phone):
     if not phone:
         return None
     
-    cleaned_phone = re.sub(r'[\s\-\(\)\+\.]', '', phone)
-    
-    if not cleaned_phone.isdigit():
-        raise ValidationError("Phone number can only contain digits and formatting characters")
+    cleaned_phone = phone.translate(_PHONE_STRIP_TABLE)
     
     if len(cleaned_phone) < 7 or len(cleaned_phone) > 15:
         raise ValidationError("Phone number must be between 7 and 15 digits")
     
+    # Stripping ASCII digits from both ends leaves nothing iff all are digits
+    if cleaned_phone.strip('0123456789'):
+        raise ValidationError("Phone number can only contain digits and formatting characters")
+    
     return phone
 
 def validate_dropdown_choice(value, field_name, valid_choices):
@@ -122,111 +218,90 @@ def validate_dropdown_choice(value, field_name, valid_choices):
     if not value:
         raise ValidationError(f"{field_name} is required")
     
-    if value not in valid_choices:
+    if not isinstance(value, str) or value not in valid_choices:
         raise ValidationError(f"Invalid {field_name} selection")
     
     return value
 
-def validate_roi_calculation(data):
+def _default_average_order_value(data, cleaned_data):
+    """Intelligent default based on industry and revenue"""
+    industry = data.get('industry', 'Other')
+    if isinstance(industry, str):
+        floor, share = _DEFAULT_AOV.get(industry, _FALLBACK_AOV)
+    else:
+        floor, share = _FALLBACK_AOV
+    return max(floor, cleaned_data.get('monthly_revenue', 0) * share)
+
+def _default_monthly_orders(data, cleaned_data):
+    """Calculate from revenue and average order value"""
+    aov = cleaned_data.get('average_order_value', 100)
+    return max(10, int(cleaned_data.get('monthly_revenue', 0) / aov))
+
+def _default_manual_hours(data, cleaned_data):
+    """Default based on business stage and revenue"""
+    # A missing stage counts as Growth, anything unrecognised as Mature
+    business_stage = data.get('business_stage', 'Growth')
+    if isinstance(business_stage, str):
+        floor, divisor = _HOURS_PER_STAGE.get(business_stage, _HOURS_PER_STAGE['Mature'])
+    else:
+        floor, divisor = _HOURS_PER_STAGE['Mature']
+    return max(floor, int(cleaned_data.get('monthly_revenue', 0) / divisor))
+
+# (field, validator, label, default) in dependency order: the order-count
+# default needs the average order value
+_OPTIONAL_CALC_FIELDS = (
+    ('average_order_value', validate_positive_number, 'Average order value', _default_average_order_value),
+    ('monthly_orders', validate_positive_integer, 'Monthly orders', _default_monthly_orders),
+    ('manual_hours_per_week', validate_positive_integer, 'Manual hours per week', _default_manual_hours),
+)
+
+# (field, label, allowed values)
+_DROPDOWN_FIELDS = (
+    ('industry', 'Industry', VALID_INDUSTRIES),
+    ('business_stage', 'Business stage', VALID_BUSINESS_STAGES),
+)
+
+def _add_error(errors, field, message, fast_fail):
+    """Record a field error, or raise it straight away in fast-fail mode"""
+    if fast_fail:
+        raise ValidationError({field: message})
+    errors[field] = message
+
+def validate_roi_calculation(data, fast_fail=False):
     """
     Validate ROI calculation data with intelligent defaults for missing fields
+    fast_fail=True raises on the first invalid field instead of collecting all
     Returns: cleaned_data dict
     Raises: ValidationError with specific field errors
     """
     errors = {}
     cleaned_data = {}
     
-    # Define valid choices
-    VALID_INDUSTRIES = [
-        'Fashion & Apparel', 'Electronics', 'Health & Wellness', 'Home & Garden',
-        'Beauty & Cosmetics', 'Food & Beverage', 'Pet Products', 'Sports & Fitness',
-        'Automotive', 'Books & Media', 'Toys & Games', 'Other'
-    ]
-    
-    VALID_BUSINESS_STAGES = ['Startup', 'Growth', 'Established', 'Mature']
-    
-    VALID_CHALLENGES = [
-        'Manual processes', 'Low conversion rates', 'High cart abandonment',
-        'Poor customer retention', 'Inventory management', 'Marketing inefficiency',
-        'Customer service issues', 'Data analysis challenges', 'Other'
-    ]
-    
     # Validate required monthly revenue
     try:
         cleaned_data['monthly_revenue'] = validate_positive_number(
             data.get('monthly_revenue'), 'Monthly revenue'
         )
     except ValidationError as e:
-        errors['monthly_revenue'] = str(e)
-    
-    # Get monthly revenue for calculations
-    monthly_revenue = cleaned_data.get('monthly_revenue', 0)
-    
-    # Average order value - optional with intelligent defaults
-    if data.get('average_order_value'):
-        try:
-            cleaned_data['average_order_value'] = validate_positive_number(
-                data.get('average_order_value'), 'Average order value'
-            )
-        except ValidationError as e:
-            errors['average_order_value'] = str(e)
-    else:
-        # Calculate intelligent default based on industry and revenue
-        industry = data.get('industry', 'Other')
-        if industry == 'Electronics':
-            cleaned_data['average_order_value'] = max(100, monthly_revenue * 0.002)
-        elif industry in ['Fashion & Apparel', 'Beauty & Cosmetics']:
-            cleaned_data['average_order_value'] = max(50, monthly_revenue * 0.001)
+        _add_error(errors, 'monthly_revenue', str(e), fast_fail)
+    
+    # Optional numeric fields fall back to a default derived from the rest
+    for field, validator, label, default in _OPTIONAL_CALC_FIELDS:
+        value = data.get(field)
+        if value:
+            try:
+                cleaned_data[field] = validator(value, label)
+            except ValidationError as e:
+                _add_error(errors, field, str(e), fast_fail)
         else:
-            cleaned_data['average_order_value'] = max(75, monthly_revenue * 0.0015)
+            cleaned_data[field] = default(data, cleaned_data)
     
-    # Monthly orders - optional with calculated default
-    if data.get('monthly_orders'):
-        try:
-            cleaned_data['monthly_orders'] = validate_positive_integer(
-                data.get('monthly_orders'), 'Monthly orders'
-            )
-        except ValidationError as e:
-            errors['monthly_orders'] = str(e)
-    else:
-        # Calculate from revenue and average order value
-        aov = cleaned_data.get('average_order_value', 100)
-        cleaned_data['monthly_orders'] = max(10, int(monthly_revenue / aov))
-    
-    # Manual hours per week - optional with business stage default
-    if data.get('manual_hours_per_week'):
+    # Validate dropdown fields
+    for field, label, choices in _DROPDOWN_FIELDS:
         try:
-            cleaned_data['manual_hours_per_week'] = validate_positive_integer(
-                data.get('manual_hours_per_week'), 'Manual hours per week'
-            )
+            cleaned_data[field] = validate_dropdown_choice(data.get(field), label, choices)
         except ValidationError as e:
-            errors['manual_hours_per_week'] = str(e)
-    else:
-        # Default based on business stage and revenue
-        business_stage = data.get('business_stage', 'Growth')
-        if business_stage == 'Startup':
-            cleaned_data['manual_hours_per_week'] = max(10, int(monthly_revenue / 5000))
-        elif business_stage == 'Growth':
-            cleaned_data['manual_hours_per_week'] = max(15, int(monthly_revenue / 4000))
-        elif business_stage == 'Established':
-            cleaned_data['manual_hours_per_week'] = max(20, int(monthly_revenue / 3000))
-        else:  # Mature
-            cleaned_data['manual_hours_per_week'] = max(25, int(monthly_revenue / 2500))
-    
-    # Validate dropdown fields
-    try:
-        cleaned_data['industry'] = validate_dropdown_choice(
-            data.get('industry'), 'Industry', VALID_INDUSTRIES
-        )
-    except ValidationError as e:
-        errors['industry'] = str(e)
-    
-    try:
-        cleaned_data['business_stage'] = validate_dropdown_choice(
-            data.get('business_stage'), 'Business stage', VALID_BUSINESS_STAGES
-        )
-    except ValidationError as e:
-        errors['business_stage'] = str(e)
+            _add_error(errors, field, str(e), fast_fail)
     
     # Validate challenges (optional)
     challenges = data.get('challenges', [])
@@ -236,12 +311,12 @@ def validate_roi_calculation(data):
         
         if isinstance(challenges, list):
             for challenge in challenges:
-                if challenge not in VALID_CHALLENGES:
-                    errors['challenges'] = f'Invalid challenge: {challenge}'
+                if not isinstance(challenge, str) or challenge not in VALID_CHALLENGES:
+                    _add_error(errors, 'challenges', f'Invalid challenge: {challenge}', fast_fail)
                     break
             cleaned_data['challenges'] = challenges
         else:
-            errors['challenges'] = 'Challenges must be a list'
+            _add_error(errors, 'challenges', 'Challenges must be a list', fast_fail)
     else:
         cleaned_data['challenges'] = []
     
@@ -251,9 +326,10 @@ def validate_roi_calculation(data):
     
     return cleaned_data
 
-def validate_roi_submission(data):
+def validate_roi_submission(data, fast_fail=False):
     """
     Validate complete ROI submission data (includes contact info)
+    Pass fast_fail=True to stop at the first invalid field
     Returns: cleaned_data dict
     Raises: ValidationError with specific field errors
     """
@@ -262,9 +338,11 @@ def validate_roi_submission(data):
     
     # First validate calculation data
     try:
-        calc_data = validate_roi_calculation(data)
+        calc_data = validate_roi_calculation(data, fast_fail)
         cleaned_data.update(calc_data)
     except ValidationError as e:
+        if fast_fail:
+            raise
         if isinstance(e.args[0], dict):
             errors.update(e.args[0])
         else:
@@ -272,13 +350,9 @@ def validate_roi_submission(data):
     
     # Add default values for required fields that might be missing
     if 'conversion_rate' not in cleaned_data:
-        industry = cleaned_data.get('industry', 'Other')
-        if industry == 'Electronics':
-            cleaned_data['conversion_rate'] = 2.5
-        elif industry == 'Fashion & Apparel':
-            cleaned_data['conversion_rate'] = 2.8
-        else:
-            cleaned_data['conversion_rate'] = 2.0
+        cleaned_data['conversion_rate'] = _DEFAULT_CONV_RATE.get(
+            cleaned_data.get('industry', 'Other'), _FALLBACK_CONV_RATE
+        )
     
     if 'cart_abandonment_rate' not in cleaned_data:
         cleaned_data['cart_abandonment_rate'] = 70.0
@@ -289,24 +363,24 @@ def validate_roi_submission(data):
             data.get('first_name'), 'First name'
         )
     except ValidationError as e:
-        errors['first_name'] = str(e)
+        _add_error(errors, 'first_name', str(e), fast_fail)
     
     try:
         cleaned_data['last_name'] = validate_alphabetic(
             data.get('last_name'), 'Last name'
         )
     except ValidationError as e:
-        errors['last_name'] = str(e)
+        _add_error(errors, 'last_name', str(e), fast_fail)
     
     try:
         cleaned_data['email'] = validate_email(data.get('email'))
     except ValidationError as e:
-        errors['email'] = str(e)
+        _add_error(errors, 'email', str(e), fast_fail)
     
     # Business name
     business_name = data.get('business_name') or data.get('company', '').strip()
     if not business_name:
-        errors['business_name'] = 'Business name is required'
+        _add_error(errors, 'business_name', 'Business name is required', fast_fail)
     else:
         cleaned_data['business_name'] = business_name
     
@@ -314,12 +388,12 @@ def validate_roi_submission(data):
     try:
         cleaned_data['website'] = validate_website(data.get('website'))
     except ValidationError as e:
-        errors['website'] = str(e)
+        _add_error(errors, 'website', str(e), fast_fail)
     
     try:
         cleaned_data['phone'] = validate_phone(data.get('phone'))
     except ValidationError as e:
-        errors['phone'] = str(e)
+        _add_error(errors, 'phone', str(e), fast_fail)
     
     # If there are any errors, raise ValidationError with all errors
     if errors:
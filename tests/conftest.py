@@ -0,0 +1,40 @@
+"""
+Shared pytest setup for the ROI Calculator tests
+"""
+import os
+import sys
+from types import MappingProxyType
+
+import pytest
+
+# Don't write .pyc files for the app modules imported during the run; the env
+# var covers worker subprocesses such as pytest-xdist's
+sys.dont_write_bytecode = True
+os.environ['PYTHONDONTWRITEBYTECODE'] = '1'
+
+# Integration keys must be present before src.main_secure is imported, so the
+# services start enabled (their HTTP calls are mocked in the tests)
+os.environ['SENDGRID_API_KEY'] = 'test-key'
+os.environ['HUBSPOT_API_KEY'] = 'test-key'
+
+# Complete, valid submission shared by the test modules; read-only so one test
+# cannot leak edits into another. Copy it with {**base_form, ...} to vary it.
+BASE_FORM = MappingProxyType({
+    'monthly_revenue': 50000,
+    'average_order_value': 75,
+    'monthly_orders': 667,
+    'industry': 'Electronics',
+    'conversion_rate': 2.0,
+    'cart_abandonment_rate': 65,
+    'manual_hours_per_week': 15,
+    'business_stage': 'Growth',
+    'first_name': 'John',
+    'last_name': 'Doe',
+    'email': 'john@example.com',
+    'business_name': 'Test Business'
+})
+
+@pytest.fixture(scope='session')
+def base_form():
+    """The shared read-only form payload"""
+    return BASE_FORM
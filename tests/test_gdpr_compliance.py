@@ -0,0 +1,71 @@
+"""
+Tests for the GDPR blueprint's cached privacy policy
+"""
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+from src.utils.gdpr_compliance import gdpr_bp
+
+URL = '/api/gdpr/privacy-policy'
+
+@pytest.fixture(scope='module')
+def client():
+    """A bare app with only the GDPR blueprint, so no other middleware touches the response"""
+    app = Flask(__name__)
+    app.register_blueprint(gdpr_bp, url_prefix='/api/gdpr')
+    return app.test_client()
+
+class TestPrivacyPolicy:
+    """Test privacy policy encoding and conditional requests"""
+    
+    def test_identity_body(self, client):
+        """Test a client without gzip gets the plain JSON body"""
+        response = client.get(URL)
+        
+        assert response.status_code == 200
+        assert 'Content-Encoding' not in response.headers
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert response.get_json()['data_controller'] == 'Chime HQ'
+    
+    def test_gzip_body(self, client):
+        """Test a gzip client gets the same policy compressed, under its own ETag"""
+        plain = client.get(URL)
+        response = client.get(URL, headers={'Accept-Encoding': 'gzip, deflate'})
+        
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert json.loads(gzip.decompress(response.data)) == plain.get_json()
+        assert response.get_etag()[0] == f'{plain.get_etag()[0]}-gzip'
+    
+    def test_gzip_refused(self, client):
+        """Test gzip;q=0 is treated as not accepting gzip"""
+        response = client.get(URL, headers={'Accept-Encoding': 'gzip;q=0'})
+        
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_json()['data_controller'] == 'Chime HQ'
+    
+    @pytest.mark.parametrize('accept_encoding', ['identity', 'gzip'])
+    def test_not_modified(self, client, accept_encoding):
+        """Test a matching If-None-Match gets an empty 304 for each encoding"""
+        headers = {'Accept-Encoding': accept_encoding}
+        etag = client.get(URL, headers=headers).headers['ETag']
+        
+        response = client.get(URL, headers={**headers, 'If-None-Match': etag})
+        
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+        assert response.headers['Vary'] == 'Accept-Encoding'
+    
+    def test_other_encoding_etag_does_not_match(self, client):
+        """Test the identity ETag does not validate a gzip response"""
+        etag = client.get(URL).headers['ETag']
+        
+        response = client.get(URL, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
@@ -0,0 +1,113 @@
+"""
+Unit tests for health alert cooldowns and the alert delivery queue
+"""
+import logging
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import monitoring
+
+HEALTHY = {'submission_success_rate': 100.0, 'email_delivery_rate': 100.0, 'hubspot_sync_rate': 100.0}
+
+class _StopWorker(Exception):
+    """Raised from the stubbed sleep to end one alert worker iteration"""
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable stand-in for the time module as monitoring sees it"""
+    fake = SimpleNamespace(now=1000.0)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(monitoring, 'time', fake)
+    monkeypatch.setattr(monitoring, '_last_alert_at', {})
+    return fake
+
+class TestHealthAlerts:
+    """Test health alert cooldown and recovery"""
+    
+    def test_should_alert_cooldown(self, clock):
+        """Test an alert fires once per cooldown"""
+        assert monitoring._should_alert('low_success_rate', cooldown=60)
+        assert not monitoring._should_alert('low_success_rate', cooldown=60)
+        # Other alerts keep their own cooldown
+        assert monitoring._should_alert('low_hubspot_sync_rate', cooldown=60)
+        
+        clock.now += 59
+        assert not monitoring._should_alert('low_success_rate', cooldown=60)
+        clock.now += 1
+        assert monitoring._should_alert('low_success_rate', cooldown=60)
+    
+    def test_clear_alert_resets_cooldown(self, clock):
+        """Test a recovered alert can fire again straight away"""
+        assert monitoring._should_alert('low_success_rate')
+        
+        monitoring._clear_alert('low_success_rate')
+        
+        assert monitoring._should_alert('low_success_rate')
+    
+    def test_health_alerts_on_degrade_and_recovery(self, clock, monkeypatch):
+        """Test a degraded metric alerts once, and again after it recovers and degrades"""
+        health = dict(HEALTHY)
+        sent = []
+        monkeypatch.setattr(monitoring, 'get_system_health', lambda: health)
+        monkeypatch.setattr(monitoring.submission_tracker, 'send_alert', lambda title, details: sent.append(title))
+        
+        health['email_delivery_rate'] = 50.0
+        monitoring.check_system_health_alerts()
+        monitoring.check_system_health_alerts()
+        assert sent == ['Low Email Delivery Rate']
+        
+        health['email_delivery_rate'] = 100.0
+        monitoring.check_system_health_alerts()
+        health['email_delivery_rate'] = 50.0
+        monitoring.check_system_health_alerts()
+        assert sent == ['Low Email Delivery Rate', 'Low Email Delivery Rate']
+
+class TestAlertQueue:
+    """Test alerts are queued for the background worker"""
+    
+    @pytest.fixture
+    def alert_queue(self, monkeypatch):
+        """A one-slot alert queue with no worker draining it"""
+        alerts = queue.Queue(maxsize=1)
+        monkeypatch.setattr(monitoring, 'alert_queue', alerts)
+        monkeypatch.setattr(monitoring, '_ensure_alert_worker', lambda: None)
+        return alerts
+    
+    def test_send_alert_queues(self, alert_queue):
+        """Test send_alert hands the alert to the worker queue"""
+        monitoring.submission_tracker.send_alert('Critical Error: email_error', {'error': 'timeout'})
+        
+        assert alert_queue.get_nowait() == ('Critical Error: email_error', {'error': 'timeout'})
+    
+    def test_full_queue_drops_alert(self, alert_queue, caplog):
+        """Test a full queue drops the alert instead of blocking the caller"""
+        alert_queue.put_nowait(('first', {}))
+        
+        with caplog.at_level(logging.WARNING, logger=monitoring.__name__):
+            monitoring.submission_tracker.send_alert('second', {})
+        
+        assert alert_queue.qsize() == 1
+        assert alert_queue.get_nowait() == ('first', {})
+        assert 'Alert queue full, dropping alert: second' in caplog.text
+    
+    def test_worker_delivers_batch(self, monkeypatch):
+        """Test the worker sends every queued alert as one batch"""
+        alerts = queue.Queue()
+        for title in ('first', 'second', 'third'):
+            alerts.put_nowait((title, {}))
+        batches = []
+        
+        def sleep(seconds):
+            raise _StopWorker
+        
+        monkeypatch.setattr(monitoring, 'alert_queue', alerts)
+        monkeypatch.setattr(monitoring, 'time', SimpleNamespace(sleep=sleep))
+        monkeypatch.setattr(monitoring.submission_tracker, 'send_slack_alerts', batches.append)
+        
+        with pytest.raises(_StopWorker):
+            monitoring._alert_worker_loop()
+        
+        assert batches == [[('first', {}), ('second', {}), ('third', {})]]
+        assert alerts.empty()
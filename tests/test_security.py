@@ -0,0 +1,155 @@
+"""
+Unit tests for the security helpers
+"""
+import base64
+
+import pytest
+
+from src.utils import security
+from src.utils.security import (
+    decrypt_sensitive_data, encrypt_sensitive_data,
+    generate_csrf_token, validate_csrf_token
+)
+
+ENCRYPTION_KEY = 'test-encryption-key'
+
+def _legacy_encrypt(data, key):
+    """The XOR+base64 scheme used before AES-GCM, for building old rows"""
+    result = ''.join(chr(ord(char) ^ ord(key[i % len(key)])) for i, char in enumerate(data))
+    return base64.b64encode(result.encode()).decode()
+
+def _raw_ciphertext(encrypted):
+    """Nonce and ciphertext bytes of a versioned value"""
+    return base64.b64decode(encrypted[len(security._CIPHERTEXT_PREFIX):])
+
+class TestEncryption:
+    """Test sensitive data encryption"""
+    
+    @pytest.mark.parametrize('data', ['john@example.com', '+1 (555) 010-0199', 'José Müller'])
+    def test_gcm_round_trip(self, data):
+        """Test encrypted values decrypt back to the original"""
+        encrypted = encrypt_sensitive_data(data, ENCRYPTION_KEY)
+        
+        assert encrypted != data
+        assert decrypt_sensitive_data(encrypted, ENCRYPTION_KEY) == data
+    
+    def test_round_trip_with_environment_key(self, monkeypatch):
+        """Test the key is read from ENCRYPTION_KEY when not passed"""
+        monkeypatch.setenv('ENCRYPTION_KEY', ENCRYPTION_KEY)
+        
+        encrypted = encrypt_sensitive_data('john@example.com')
+        assert decrypt_sensitive_data(encrypted, ENCRYPTION_KEY) == 'john@example.com'
+    
+    def test_ciphertext_is_versioned(self):
+        """Test new values carry the format prefix"""
+        encrypted = encrypt_sensitive_data('john@example.com', ENCRYPTION_KEY)
+        assert encrypted.startswith(security._CIPHERTEXT_PREFIX)
+    
+    def test_nonce_differs_per_call(self):
+        """Test encrypting the same value twice uses fresh nonces"""
+        first = _raw_ciphertext(encrypt_sensitive_data('john@example.com', ENCRYPTION_KEY))
+        second = _raw_ciphertext(encrypt_sensitive_data('john@example.com', ENCRYPTION_KEY))
+        
+        assert first[:security._NONCE_SIZE] != second[:security._NONCE_SIZE]
+        assert first != second
+    
+    def test_wrong_key_does_not_decrypt(self, caplog):
+        """Test a versioned value under another key decrypts to None and is logged"""
+        encrypted = encrypt_sensitive_data('john@example.com', ENCRYPTION_KEY)
+        
+        assert decrypt_sensitive_data(encrypted, 'another-key') is None
+        assert 'Failed to decrypt' in caplog.text
+    
+    def test_corrupted_value_does_not_decrypt(self):
+        """Test a versioned value that is not valid base64 decrypts to None"""
+        encrypted = encrypt_sensitive_data('john@example.com', ENCRYPTION_KEY)
+        assert decrypt_sensitive_data(encrypted + '!', ENCRYPTION_KEY) is None
+    
+    def test_unversioned_gcm_value_decrypts(self):
+        """Test GCM values stored before the prefix still decrypt"""
+        encrypted = encrypt_sensitive_data('john@example.com', ENCRYPTION_KEY)
+        unversioned = encrypted[len(security._CIPHERTEXT_PREFIX):]
+        assert decrypt_sensitive_data(unversioned, ENCRYPTION_KEY) == 'john@example.com'
+    
+    @pytest.mark.parametrize('data', ['john@example.com', '+1 (555) 010-0199', 'José Müller'])
+    def test_legacy_xor_value_decrypts(self, data):
+        """Test values stored with the old XOR scheme still decrypt"""
+        legacy = _legacy_encrypt(data, ENCRYPTION_KEY)
+        assert decrypt_sensitive_data(legacy, ENCRYPTION_KEY) == data
+    
+    @pytest.mark.parametrize('helper', [encrypt_sensitive_data, decrypt_sensitive_data])
+    def test_missing_key_raises(self, monkeypatch, helper):
+        """Test both helpers refuse to run without ENCRYPTION_KEY"""
+        monkeypatch.delenv('ENCRYPTION_KEY', raising=False)
+        
+        with pytest.raises(ValueError, match='ENCRYPTION_KEY'):
+            helper('john@example.com')
+    
+    @pytest.mark.parametrize('helper', [encrypt_sensitive_data, decrypt_sensitive_data])
+    def test_empty_value_passes_through(self, helper):
+        """Test empty values are returned unchanged"""
+        assert helper('', ENCRYPTION_KEY) == ''
+        assert helper(None, ENCRYPTION_KEY) is None
+
+class TestCSRFTokens:
+    """Test stateless CSRF tokens"""
+    
+    @pytest.fixture(autouse=True)
+    def _csrf_key(self, monkeypatch):
+        monkeypatch.setenv('CSRF_KEY', 'test-csrf-key')
+    
+    def test_valid_token(self):
+        """Test a freshly issued token validates"""
+        assert validate_csrf_token(generate_csrf_token())
+    
+    def test_tampered_mac(self):
+        """Test a token with a modified MAC is rejected"""
+        raw = bytearray(base64.urlsafe_b64decode(generate_csrf_token()))
+        raw[-1] ^= 0x01
+        
+        assert not validate_csrf_token(base64.urlsafe_b64encode(bytes(raw)).decode())
+    
+    def test_other_key_rejected(self, monkeypatch):
+        """Test a token signed under another key is rejected"""
+        token = generate_csrf_token()
+        monkeypatch.setenv('CSRF_KEY', 'rotated-csrf-key')
+        
+        assert not validate_csrf_token(token)
+    
+    @pytest.mark.parametrize('token', [
+        None,
+        '',
+        'not base64!',
+        base64.urlsafe_b64encode(b'too short').decode(),
+        base64.urlsafe_b64encode(bytes(security._CSRF_TOKEN_SIZE + 1)).decode(),
+    ])
+    def test_malformed_token(self, token):
+        """Test wrong-length or undecodable tokens are rejected"""
+        assert not validate_csrf_token(token)
+    
+    def test_expired_token(self, monkeypatch):
+        """Test a token is rejected once its TTL has passed"""
+        issued_at = 1_700_000_000
+        monkeypatch.setattr(security.time, 'time', lambda: issued_at)
+        token = generate_csrf_token()
+        
+        monkeypatch.setattr(security.time, 'time', lambda: issued_at + security.CSRF_TOKEN_TTL_SECONDS)
+        assert validate_csrf_token(token)
+        
+        monkeypatch.setattr(security.time, 'time', lambda: issued_at + security.CSRF_TOKEN_TTL_SECONDS + 1)
+        assert not validate_csrf_token(token)
+    
+    def test_falls_back_to_secret_key(self, monkeypatch):
+        """Test SECRET_KEY signs tokens when CSRF_KEY is unset"""
+        monkeypatch.delenv('CSRF_KEY')
+        monkeypatch.setenv('SECRET_KEY', 'test-secret-key')
+        
+        assert validate_csrf_token(generate_csrf_token())
+    
+    def test_missing_keys_raise(self, monkeypatch):
+        """Test tokens cannot be issued without CSRF_KEY or SECRET_KEY"""
+        monkeypatch.delenv('CSRF_KEY')
+        monkeypatch.delenv('SECRET_KEY', raising=False)
+        
+        with pytest.raises(ValueError, match='CSRF_KEY or SECRET_KEY'):
+            generate_csrf_token()
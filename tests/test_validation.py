@@ -0,0 +1,290 @@
+"""
+Unit tests for lead scoring and form validation
+These need no Flask app or database, so this module never imports src.main_secure
+"""
+import pytest
+
+from src.utils import validation
+from src.utils.lead_scoring import (
+    TIERS, assign_tier, calculate_lead_score, calculate_lead_score_numeric, lead_score_inputs
+)
+from src.utils.validation import (
+    ValidationError, validate_email, validate_phone, validate_roi_calculation,
+    validate_roi_submission, validate_website
+)
+
+class TestLeadScoring:
+    """Test lead scoring algorithm"""
+    
+    @pytest.mark.parametrize('data, min_score, max_score, expected_tier', [
+        pytest.param({
+            'monthly_revenue': 100000,
+            'industry': 'E-commerce',
+            'business_stage': 'Growth',
+            'conversion_rate': 2.5,
+            'cart_abandonment_rate': 70,
+            'manual_hours_per_week': 20,
+            'monthly_ad_spend': 10000
+        }, 90, float('inf'), 'Hot', id='high'),
+        pytest.param({
+            'monthly_revenue': 25000,
+            'industry': 'Fashion',
+            'business_stage': 'Established',
+            'conversion_rate': 1.5,
+            'cart_abandonment_rate': 65,
+            'manual_hours_per_week': 10,
+            'monthly_ad_spend': 2000
+        }, 60, 90, 'Warm', id='medium'),
+        pytest.param({
+            'monthly_revenue': 5000,
+            'industry': 'Other',
+            'business_stage': 'Startup',
+            'conversion_rate': 0.5,
+            'cart_abandonment_rate': 50,
+            'manual_hours_per_week': 5,
+            'monthly_ad_spend': 100
+        }, 0, 60, 'Cold', id='low'),
+    ])
+    def test_lead_score(self, data, min_score, max_score, expected_tier):
+        """Test lead score falls in the expected tier band"""
+        score, tier, breakdown = calculate_lead_score(data)
+        
+        assert min_score <= score < max_score
+        assert tier == expected_tier
+        assert assign_tier(score) == expected_tier
+        assert breakdown['demographic'] + breakdown['behavioral'] + breakdown['fit'] == score
+    
+    @pytest.mark.parametrize('challenges', [
+        None,
+        '["Manual processes", "Low conversion rates"]',
+        ['Other: ' + 'a long description of a challenge nobody listed' * 2],
+        'not json',
+    ])
+    def test_numeric_core_matches(self, base_form, challenges):
+        """Test the bulk scorer agrees with the per-submission one"""
+        data = {**base_form, 'biggest_challenges': challenges, 'website': 'https://shop.example'}
+        score, tier, breakdown = calculate_lead_score(data)
+        
+        numeric_score, tier_idx, demographic, behavioral, fit = calculate_lead_score_numeric(
+            *lead_score_inputs(data)
+        )
+        assert (numeric_score, TIERS[tier_idx]) == (score, tier)
+        assert (demographic, behavioral, fit) == (
+            breakdown['demographic'], breakdown['behavioral'], breakdown['fit']
+        )
+    
+    def test_breakdown_details(self):
+        """Test the per-item points behind a fully filled submission"""
+        _, _, breakdown = calculate_lead_score({
+            'monthly_revenue': 600000,
+            'business_stage': 'Mature',
+            'website': 'https://shop.example',
+            'phone': '+1234567890',
+            'monthly_ad_spend': 5000,
+            'biggest_challenges': ['Manual processes', 'Low conversion rates'],
+            'manual_hours_per_week': 25,
+            'industry': 'Beauty & Cosmetics'
+        })
+        
+        assert breakdown == {
+            'demographic': 60,
+            'behavioral': 52,
+            'fit': 28,
+            'details': {
+                'revenue_tier': 60,
+                'business_stage': 40,
+                'website_filled': 10,
+                'phone_filled': 10,
+                'monthly_ad_spend_filled': 10,
+                'detailed_challenges': 12,
+                'high_manual_hours': 10,
+                'industry_fit': 15,
+                'challenge_alignment': 13
+            }
+        }
+
+class TestFormValidation:
+    """Test form validation"""
+    
+    def test_valid_form_data(self, base_form):
+        """Test validation with valid form data"""
+        result = validate_roi_submission(base_form)
+        assert result['email'] == 'john@example.com'
+        assert result['monthly_revenue'] == 50000
+    
+    def test_invalid_email_validation(self, base_form):
+        """Test validation with invalid email"""
+        data = {**base_form, 'email': 'invalid-email'}
+        
+        with pytest.raises(ValidationError) as excinfo:
+            validate_roi_submission(data)
+        assert 'email' in excinfo.value.args[0]
+    
+    def test_missing_required_fields(self):
+        """Test validation with missing required fields"""
+        data = {
+            'monthly_revenue': 50000,
+            # Missing other required fields
+        }
+        
+        with pytest.raises(ValidationError) as excinfo:
+            validate_roi_submission(data)
+        assert set(excinfo.value.args[0]) == {
+            'industry', 'business_stage', 'first_name', 'last_name', 'email', 'business_name'
+        }
+    
+    @pytest.mark.parametrize('email, expected', [
+        ('john@example.com', 'john@example.com'),
+        ('JOHN@Example.COM', 'john@example.com'),
+        ('first.last@example.co.uk', 'first.last@example.co.uk'),
+        ('user+tag@example.io', 'user+tag@example.io'),
+        ('user_name@sub.example.org', 'user_name@sub.example.org'),
+        ('a@b.cd', 'a@b.cd'),
+    ])
+    def test_accepted_emails(self, base_form, email, expected):
+        """Test well-formed emails are accepted and lowercased"""
+        result = validate_roi_submission(dict(base_form, email=email))
+        assert result['email'] == expected
+    
+    @pytest.mark.parametrize('email', [
+        'invalid-email',
+        '@example.com',
+        'john@',
+        'john@example',
+        'john@example.c',
+        'john doe@example.com',
+        'john@@example.com',
+        'j\u00f6hn@example.com',
+        'john@exa_mple.com',
+    ])
+    def test_rejected_emails(self, base_form, email):
+        """Test malformed emails are rejected on the email field"""
+        with pytest.raises(ValidationError) as excinfo:
+            validate_roi_submission(dict(base_form, email=email))
+        assert excinfo.value.args[0] == {'email': 'Invalid email format'}
+    
+    @pytest.mark.parametrize('website', [
+        'example.com/a\r\nX-Injected: 1',
+        'example.com/a\tb',
+        'https://example.com/\x00',
+        'example.com/a b',
+        'example.com/a\u3000b',
+    ])
+    def test_website_rejects_control_and_whitespace(self, website):
+        """Test control and whitespace characters are not passed through"""
+        with pytest.raises(ValidationError):
+            validate_website(website)
+    
+    @pytest.mark.parametrize('phone, expected', [
+        ('+1 (555) 010-0199', '+1 (555) 010-0199'),
+        ('  555.010.0199  ', '555.010.0199'),
+        ('', None),
+        ('   ', None),
+        (None, None),
+    ])
+    def test_valid_phone(self, phone, expected):
+        """Test accepted phone numbers come back trimmed"""
+        assert validate_phone(phone) == expected
+    
+    @pytest.mark.parametrize('phone, message', [
+        # Too short to reach the digit check, so the length error wins
+        ('abc', 'between 7 and 15 digits'),
+        ('123456', 'between 7 and 15 digits'),
+        ('1234567890123456', 'between 7 and 15 digits'),
+        # Only ASCII digits count, not other Unicode decimal digits
+        ('\u0665\u0665\u0665\u0660\u0661\u0660\u0660\u0661\u0669\u0669', 'only contain digits'),
+        ('\uff15\uff15\uff15\uff10\uff11\uff10\uff10\uff11\uff19\uff19', 'only contain digits'),
+        ('555-010-ABCD', 'only contain digits'),
+    ])
+    def test_invalid_phone(self, phone, message):
+        """Test rejected phone numbers report the right reason"""
+        with pytest.raises(ValidationError, match=message):
+            validate_phone(phone)
+
+class TestValidatorCache:
+    """Test the memoized website validator"""
+    
+    @pytest.fixture(autouse=True)
+    def _empty_cache(self):
+        validate_website.cache_clear()
+        yield
+        validate_website.cache_clear()
+    
+    def test_repeat_value_hits_cache(self):
+        """Test a repeated value is answered from the cache"""
+        assert validate_website('example.com') == 'https://example.com'
+        assert validate_website('example.com') == 'https://example.com'
+        
+        info = validate_website.cache_info()
+        assert (info.hits, info.misses) == (1, 1)
+    
+    def test_cached_error_reraises(self):
+        """Test a cached failure raises the same ValidationError again"""
+        for _ in range(2):
+            with pytest.raises(ValidationError, match='Invalid website URL format'):
+                validate_website('not a url')
+        
+        assert validate_website.cache_info().hits == 1
+    
+    @pytest.mark.parametrize('call, expected', [
+        (lambda: validate_website(None), None),
+        (lambda: validate_website(type('Url', (str,), {})('example.com')), 'https://example.com'),
+        (lambda: validate_website(website='example.com'), 'https://example.com'),
+    ], ids=['none', 'str-subclass', 'keyword'])
+    def test_non_str_and_keyword_calls_bypass_cache(self, call, expected):
+        """Test non-str values and keyword calls skip the cache"""
+        assert call() == expected
+        
+        info = validate_website.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (0, 0, 0)
+    
+    def test_pii_validators_are_not_cached(self):
+        """Test email and phone validation keep no cache of submitted values"""
+        assert not hasattr(validate_email, 'cache_info')
+        assert not hasattr(validate_phone, 'cache_info')
+
+def _not_reached(*args, **kwargs):
+    """Stand-in for validators that fast-fail mode must skip"""
+    pytest.fail('validator ran after a fast-fail error')
+
+class TestFastFail:
+    """Test fast_fail stops at the first invalid field"""
+    
+    def test_calculation_stops_at_first_error(self, base_form, monkeypatch):
+        """Test validate_roi_calculation raises on the first bad field only"""
+        monkeypatch.setattr(validation, 'validate_dropdown_choice', _not_reached)
+        data = {**base_form, 'monthly_revenue': -1, 'industry': 'Unknown'}
+        
+        with pytest.raises(ValidationError) as excinfo:
+            validate_roi_calculation(data, fast_fail=True)
+        assert excinfo.value.args[0] == {'monthly_revenue': 'Monthly revenue must be positive'}
+    
+    def test_submission_stops_at_calculation_error(self, base_form, monkeypatch):
+        """Test a calculation error skips the contact validators"""
+        monkeypatch.setattr(validation, 'validate_alphabetic', _not_reached)
+        monkeypatch.setattr(validation, 'validate_email', _not_reached)
+        data = {**base_form, 'business_stage': 'Unknown', 'email': 'invalid-email'}
+        
+        with pytest.raises(ValidationError) as excinfo:
+            validate_roi_submission(data, fast_fail=True)
+        assert list(excinfo.value.args[0]) == ['business_stage']
+    
+    def test_submission_stops_at_first_contact_error(self, base_form, monkeypatch):
+        """Test the first bad contact field raises before the later ones run"""
+        monkeypatch.setattr(validation, 'validate_email', _not_reached)
+        monkeypatch.setattr(validation, 'validate_phone', _not_reached)
+        data = {**base_form, 'last_name': 'D0e', 'email': 'invalid-email'}
+        
+        with pytest.raises(ValidationError) as excinfo:
+            validate_roi_submission(data, fast_fail=True)
+        assert excinfo.value.args[0] == {
+            'last_name': 'Last name can only contain letters, spaces, hyphens, and apostrophes'
+        }
+    
+    def test_default_mode_collects_every_error(self, base_form):
+        """Test the default mode still reports all invalid fields together"""
+        data = {**base_form, 'last_name': 'D0e', 'email': 'invalid-email'}
+        
+        with pytest.raises(ValidationError) as excinfo:
+            validate_roi_submission(data)
+        assert set(excinfo.value.args[0]) == {'last_name', 'email'}